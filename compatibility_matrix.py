@@ -1,18 +1,30 @@
 import av
+import io
+import asyncio
 import json
+import hashlib
+import functools
+import contextlib
 import re
-import csv
 import os
 import sys
+import mmap
+import shutil
 import subprocess
-import curses
+import multiprocessing
 import argparse
 import textwrap
 
-from textwrap import fill
 from tabulate import tabulate
 from typing import Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain, repeat
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 ################################################################################
 # Easy FFMPEG - Compatibility Matrix - E. Spencer 2024                         #
@@ -33,17 +45,249 @@ if getattr(sys, 'frozen', False):
 else:
     RUNPATH = os.path.abspath(os.path.dirname(__file__))
 
+DEVNULL = "NUL" if sys.platform.startswith("win") else "/dev/null"
+
+# ffmpeg command prefixes which generate a short test signal for the probes.
+# The input side is capped to one thread, as many probes run at once.
+PROBE_INPUT_COMMANDS = {
+    "video": (
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-threads", "1", "-f", "lavfi", "-i", "color=c=black:s=64x64:r=25"
+    ),
+    "audio": (
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-threads", "1", "-f", "lavfi",
+        "-i", "sine=frequency=1000:duration=0.1:sample_rate=44100"
+    ),
+}
+
+# Splits a muxer description into names, dropping brackets, spaces and slashes
+MUXER_TOKEN_RE = re.compile(r"[^ /()]+")
+
+# Matches the output number ffmpeg reports when an output fails, e.g.
+# "output file #3", "[out#3/mp4 @ ...]" or "[vost#3:0/libx264 @ ...]"
+PROBE_OUTPUT_RE = re.compile(rb"(?:output file #|out#|[av]ost#)(\d+)")
+
+# Version of the probe logic, part of the build cache key. Bump this whenever
+# a change to the probes could change the matrix, so stale caches are ignored.
+PROBE_VERSION = 4
+
+# Formats the in-process probe leaves to ffmpeg. Segmenting and manifest
+# muxers write files of their own and accept any codec from PyAV, and caf
+# raises SIGFPE when its header is written to memory.
+SUBPROCESS_ONLY_FORMATS = frozenset((
+    "caf", "dash", "fifo", "hds", "hls", "segment", "smoothstreaming",
+    "ssegment", "stream_segment", "tee", "webm_chunk",
+))
+
+# AVFMT_NOFILE, set on muxers which do their own I/O instead of writing to
+# the AVIOContext they are given
+AVFMT_NOFILE = 0x0001
+
+# Formats whose codec query in libavformat is stricter than the muxer, which
+# falls back to generic codec tags. A rejection there is not final.
+LOOSE_QUERY_FORMATS = frozenset(("avi", "matroska"))
+
+# ffmpeg error messages which mean a codec was rejected
+PROBE_ERROR_RE = re.compile(
+    rb"codec not currently supported in container"
+    rb"|Unknown encoder"
+    rb"|incorrect codec parameters"
+    rb"|Unable to find a suitable codec"
+)
+
+# Table columns for encoder and codec attributes, and whether each is a list
+ENCODER_FIELDS = (
+    ("long_name", False),
+    ("muxers", True),
+    ("options", True),
+    ("file_extensions", True),
+    ("video_codecs", True),
+    ("audio_codecs", True),
+)
+CODEC_FIELDS = (
+    ("id", False),
+    ("codec_name", False),
+    ("long_name", False),
+    ("type", False),
+    ("video_formats", True),
+    ("audio_formats", True),
+)
+
+@functools.lru_cache(maxsize=None)
+def getWriteCodec(codec_name):
+    """
+    Return the PyAV Codec object for an encoder, or None if there is no such
+    encoder. Cached, as every codec is probed against every container.
+    """
+    try:
+        return av.codec.Codec(codec_name, mode='w')
+    except Exception as e:
+        return None
+
+def probeEncodeInProcess(encoder_format, codec_name, type):
+    """
+    Open an in-memory container with PyAV, add a stream for the codec and
+    write the header. Returns False only when the container rejects the codec
+    as the stream is added. Returns None, leaving the pair to the ffmpeg
+    probe, if PyAV cannot instantiate the codec or the encoder cannot be set
+    up the way ffmpeg would set it up.
+    """
+    cdc = getWriteCodec(codec_name)
+    if not cdc:
+        return None
+
+    try:
+        with av.open(io.BytesIO(), mode="w", format=encoder_format) as container:
+            if type == "video":
+                rate = 25
+            else:
+                # Mirror ffmpeg, which resamples the 44100Hz test tone to the
+                # closest rate the encoder supports
+                audio_rates = list(cdc.audio_rates or ())
+                if audio_rates and 44100 not in audio_rates:
+                    rate = min(audio_rates, key=lambda r: (abs(r - 44100), -r))
+                else:
+                    rate = 44100
+
+            try:
+                stream = container.add_stream(codec_name, rate=rate)
+            except ValueError:
+                # avformat_query_codec rejected the pair. Some formats reject
+                # codecs there which their muxer still writes
+                if encoder_format in LOOSE_QUERY_FORMATS:
+                    return None
+                return False
+
+            if type == "video":
+                # The ffmpeg probe asks for yuv420p. Codecs without it are
+                # left to ffmpeg, which picks the closest format itself
+                video_formats = [fmt.name for fmt in (cdc.video_formats or ())]
+                if video_formats and "yuv420p" not in video_formats:
+                    return None
+                stream.width = 64
+                stream.height = 64
+                stream.pix_fmt = "yuv420p"
+            else:
+                stream.layout = "mono"
+            container.start_encoding()
+        return True
+    except Exception as e:
+        # The encoder could not be opened with these settings, which ffmpeg
+        # may still negotiate (e.g. colour range, channel layout)
+        return None
+
+@functools.lru_cache(maxsize=4096)
+def wrapJoinedText(text, width):
+    """
+    Wrap text to width and join the lines. Cached, as tables repeat the same
+    values (muxer names, codec lists) across many rows.
+    """
+    return "\n".join(textwrap.wrap(text, width=width))
+
+def isNumber(text):
+    """
+    True if a table cell holds a number, which tables right-align
+    """
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+def canProbeInProcess(encoder_format) -> bool:
+    """
+    Whether a container format can be probed in memory with PyAV. Formats
+    which open their own files (AVFMT_NOFILE), and segmenting and manifest
+    muxers, write into the working directory and accept codecs ffmpeg
+    rejects. Others fault inside libavformat as the header is written.
+    """
+    if encoder_format in SUBPROCESS_ONLY_FORMATS:
+        return False
+    try:
+        fmt = av.format.ContainerFormat(encoder_format, mode="w")
+        return not (int(fmt.flags) & AVFMT_NOFILE)
+    except Exception as e:
+        return False
+
+def probeEncoderInProcess(encoder_format, video_codecs, audio_codecs):
+    """
+    Run the in-process probe for every video and audio codec against one
+    container format. This is module level so ProcessPoolExecutor workers can
+    run it. Returns a list of results for each codec list, all None when the
+    format is left to ffmpeg.
+    """
+    if not canProbeInProcess(encoder_format):
+        return [None] * len(video_codecs), [None] * len(audio_codecs)
+
+    return (
+        [probeEncodeInProcess(encoder_format, c, "video") for c in video_codecs],
+        [probeEncodeInProcess(encoder_format, c, "audio") for c in audio_codecs]
+    )
+
 class CompatibilityMatrix:
     def __init__(self):
-        self.encoders = sorted(av.formats_available)
-        self.output_encoders = self.getOutputEncodersList()
-        self.codecs = sorted(av.codecs_available)
+        self._muxers = None
+        self._muxer_name_set = None
+        self._encoder_cache = {}
+        self._encoder_details = {}
         self.matrix_file = os.path.join(RUNPATH, "compatibility_matrix.json")
-        self.codec_list_video = self.buildCodecList("video", mode='w')
-        self.codec_list_audio = self.buildCodecList("audio", mode='w')
-        self.no_workers = 200
-        self.codec_matrix = self.loadCodecMatrix()
+        self.cache_dir = os.path.join(RUNPATH, ".ffcache")
+        self.no_workers = max(1, os.cpu_count() or 4)
+        self.probe_in_process = True
+        self.probe_batch_size = 16
         self.encoder_attributes_json = {}
+        self._attributes_key = None
+        self._search_indexes = None
+        self.use_tabulate = False
+        self.use_build_cache = True
+
+    # The encoder/codec lists and the matrix are built on first use, so that
+    # paths such as --codec do not pay for setting up everything else
+
+    @functools.cached_property
+    def encoders(self) -> list:
+        return list(av.formats_available)
+
+    @functools.cached_property
+    def format_registry(self) -> dict:
+        """
+        Snapshot of every format which can be opened for writing, built in
+        one pass over the PyAV registry.
+        """
+        registry = {}
+        for encoder_name in self.encoders:
+            try:
+                registry[encoder_name] = av.format.ContainerFormat(
+                    encoder_name, mode='w'
+                )
+            except Exception as e:
+                pass
+        return registry
+
+    @functools.cached_property
+    def output_encoders(self) -> list:
+        return self.getOutputEncodersList()
+
+    @functools.cached_property
+    def codecs(self) -> list:
+        return list(av.codecs_available)
+
+    @functools.cached_property
+    def codec_lists(self) -> tuple:
+        return self.buildCodecLists()
+
+    @property
+    def codec_list_video(self) -> list:
+        return self.codec_lists[0]
+
+    @property
+    def codec_list_audio(self) -> list:
+        return self.codec_lists[1]
+
+    @functools.cached_property
+    def codec_matrix(self):
+        return self.loadCodecMatrix()
 
     def loadCodecMatrix(self):
         """
@@ -54,32 +298,48 @@ class CompatibilityMatrix:
             print("Codec compatibility matrix not found, use --build-matrix")
             return None
 
-        with open(self.matrix_file, "r") as json_file:
-            codec_matrix = json.load(json_file)
+        codec_matrix = self.readJsonFile(self.matrix_file)
         return codec_matrix
 
-    def buildCodecList(self, type, mode='w') -> list:
+    def readJsonFile(self, file_path):
         """
-        This returns a list of codecs that are available. Note that mode='w'
-        returns a list of codecs which are capable out encoding. mode='r' would
-        return a list of encoders which can decode.
+        Read a JSON file, parsing the raw bytes with orjson when it is
+        installed and falling back to the standard library otherwise. orjson
+        parses straight from a memory map of the file, without copying it.
         """
-        codec_list = []
+        if orjson:
+            with open(file_path, "rb") as json_file:
+                if not os.fstat(json_file.fileno()).st_size:
+                    # Empty files cannot be mapped, let orjson raise its error
+                    return orjson.loads(b"")
+                with mmap.mmap(
+                    json_file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mapped, memoryview(mapped) as view:
+                    return orjson.loads(view)
+
+        with open(file_path, "r") as json_file:
+            return json.load(json_file)
+
+    def buildCodecLists(self):
+        """
+        Build the video and audio lists of codecs capable of encoding in a
+        single pass, constructing each Codec object once. The lists are
+        sorted, which the matrix build relies on to keep its output sorted.
+        """
+        codec_lists = {"video": [], "audio": []}
         for codec_name in self.codecs:
-            try:
-                cdc = av.codec.Codec(codec_name, mode=mode)
-                if cdc.type == type:
-                    codec_list.append(codec_name.lower())
-            except Exception as e:
-                pass
-        return codec_list
+            cdc = getWriteCodec(codec_name)
+            if cdc and cdc.type in codec_lists:
+                codec_lists[cdc.type].append(codec_name.lower())
+        return sorted(codec_lists["video"]), sorted(codec_lists["audio"])
 
     def cleanAndSplitText(self, text):
-        return re.split(r'[ /]+', re.sub(r'[()]', '', text.lower()))
+        return MUXER_TOKEN_RE.findall(text.lower())
 
     def ffmpegOutput(self, command):
         result = subprocess.run(
             command,
+            stdin=subprocess.DEVNULL,
             capture_output=True,
             text=True,
         )
@@ -87,7 +347,13 @@ class CompatibilityMatrix:
 
     def ffmpegCheckInstalled(self):
         try:
-            result = self.ffmpegOutput(["ffmpeg", "-version"])
+            # Only the exit code matters, so the output is not captured
+            result = subprocess.run(
+                ["ffmpeg", "-version"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
             if result.returncode == 0:
                 return True
             else:
@@ -97,7 +363,51 @@ class CompatibilityMatrix:
 
     def getMuxers(self) -> list:
         """
-        Get a list of available Muxers from the FFmpeg command line.
+        Get a list of available Muxers from the FFmpeg command line. The list
+        is static for a given ffmpeg build, so it is parsed once and cached,
+        on disk as well, keyed on the ffmpeg binary.
+        """
+        if self._muxers is None:
+            binary_key = self.getFfmpegBinaryKey()
+            cache_file = None
+            if binary_key:
+                cache_file = os.path.join(self.cache_dir, f"muxers-{binary_key}.json")
+                try:
+                    self._muxers = self.readJsonFile(cache_file)
+                    return self._muxers
+                except Exception as e:
+                    pass
+
+            self._muxers = self.parseMuxers()
+
+            if cache_file:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    self.writeJsonFile(cache_file, self._muxers)
+                except Exception as e:
+                    print(f"Could not cache muxer list: {e}")
+        return self._muxers
+
+    def getFfmpegBinaryKey(self) -> Optional[str]:
+        """
+        Key which changes whenever the ffmpeg binary on the PATH changes,
+        taken from its path, size and modification time. This only needs a
+        stat, not an ffmpeg run. Returns None if ffmpeg cannot be found.
+        """
+        ffmpeg_path = shutil.which("ffmpeg")
+        if not ffmpeg_path:
+            return None
+        try:
+            ffmpeg_path = os.path.realpath(ffmpeg_path)
+            stat = os.stat(ffmpeg_path)
+        except OSError as e:
+            return None
+        key = f"{ffmpeg_path}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+        return hashlib.blake2b(key, digest_size=8).hexdigest()
+
+    def parseMuxers(self) -> list:
+        """
+        Run ffmpeg -muxers and parse the output into a list of muxers.
         """
         result = self.ffmpegOutput(["ffmpeg", "-muxers"])
         output = result.stdout
@@ -108,14 +418,13 @@ class CompatibilityMatrix:
         start_index = next(i for i, line in enumerate(lines) if "---" in line) + 1
         muxer_lines = lines[start_index:]
 
-        reader = csv.reader(muxer_lines, delimiter=' ', skipinitialspace=True)
-        for row in reader:
-            if len(row) < 3:
+        for line in muxer_lines:
+            parts = line.split(None, 2)
+            if len(parts) < 3:
                 continue
 
-            flag = row[0]
-            name = row[1]
-            description = ' '.join(row[2:]).strip()
+            flag, name, description = parts
+            description = description.strip()
 
             muxers.append({
                 "flag": flag,
@@ -128,12 +437,20 @@ class CompatibilityMatrix:
     def getEncoder(self, encoder_name, mode='w') -> Optional[av.format.ContainerFormat]:
         """
         Note that pyAV calls Endcoders in ffmpeg "Formats". This function returns a
-        Container format object
+        Container format object. Output formats come from the registry snapshot,
+        other modes are cached by name and mode.
         """
-        try:
-            return av.format.ContainerFormat(encoder_name, mode=mode)
-        except Exception as e:
-            return None
+        if mode == 'w' and encoder_name in self.format_registry:
+            return self.format_registry[encoder_name]
+
+        key = (encoder_name, mode)
+        if key not in self._encoder_cache:
+            try:
+                enc = av.format.ContainerFormat(encoder_name, mode=mode)
+            except Exception as e:
+                enc = None
+            self._encoder_cache[key] = enc
+        return self._encoder_cache[key]
 
     def getEncoderLongName(self, enc) -> str:
         return enc.long_name
@@ -143,20 +460,30 @@ class CompatibilityMatrix:
         Returns a list of export file extensions which are compatible with the
         Encoder
         """
-        file_extensions = [ext.lower() for ext in enc.extensions] if enc.extensions else []
-        file_extensions.sort()
-        return file_extensions
+        return self.getEncoderDetails(enc)["file_extensions"]
 
     def getEncoderOptions(self, enc) -> list:
         """
         Returns a list of options which can be applied to the Encoder
         """
-        if enc and hasattr(enc, 'options') and enc.options:
-            options = [option.name for option in enc.options]
-        else:
+        return self.getEncoderDetails(enc)["options"]
+
+    def getEncoderDetails(self, enc) -> dict:
+        """
+        The file extensions and options of an Encoder, lower cased and sorted
+        once per Encoder, as searches and tables ask for them repeatedly.
+        """
+        details = self._encoder_details.get(enc.name)
+        if details is None:
             options = []
-        options.sort()
-        return options
+            if hasattr(enc, 'options') and enc.options:
+                options = sorted(option.name for option in enc.options)
+            details = {
+                "file_extensions": sorted(ext.lower() for ext in (enc.extensions or ())),
+                "options": options
+            }
+            self._encoder_details[enc.name] = details
+        return details
 
     def getEncoderMuxer(self, enc) -> str:
         """
@@ -174,18 +501,13 @@ class CompatibilityMatrix:
         This searches the list of available ffmpeg muxers, and finds which
         ones match the muxer listed in the Container format object
         """
-        muxers_list = []
         muxer = self.getEncoderMuxer(enc)
         muxer_split = self.cleanAndSplitText(muxer)
-        muxers = self.getMuxers()
 
-        for mux in muxers:
-            for part in muxer_split:
-                if mux['name'].lower() == part:
-                    muxers_list.append(mux['name'].lower())
+        if self._muxer_name_set is None:
+            self._muxer_name_set = {mux['name'].lower() for mux in self.getMuxers()}
 
-        muxers_list.sort()
-        return muxers_list
+        return sorted(self._muxer_name_set.intersection(muxer_split))
 
     def getOutputEncodersList(self) -> list:
         """
@@ -193,114 +515,375 @@ class CompatibilityMatrix:
         encoding
         """
         output_formats = []
-        for encoder_name in self.encoders:
-            enc = self.getEncoder(encoder_name, 'w')
-            if not enc:
-                continue
-            else:
-                if enc.is_output:
-                    output_formats.append(enc.name.lower())
+        for enc in self.format_registry.values():
+            if enc.is_output:
+                output_formats.append(enc.name.lower())
 
+        output_formats.sort()
         return output_formats
 
-    def buildEncoderMatrix(self) -> dict:
-        compatibility_matrix = {}
-        item = 0
+    def readCheckpoint(self, checkpoint_file) -> dict:
+        """
+        Read the encoders completed by an interrupted build. A line cut short
+        by the interruption is dropped from the file, and that encoder is
+        probed again.
+        """
+        completed = {}
+        if not checkpoint_file or not os.path.exists(checkpoint_file):
+            return completed
+
+        valid_lines = []
+        with open(checkpoint_file, "r") as f:
+            lines = f.readlines()
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                completed[entry["encoder"]] = {"codecs": entry["codecs"]}
+                valid_lines.append(line if line.endswith("\n") else line + "\n")
+            except Exception as e:
+                continue
 
-        for encoder_name in self.output_encoders:
-            item += 1
+        if valid_lines != lines:
+            tmp_file = f"{checkpoint_file}.tmp"
+            with open(tmp_file, "w") as f:
+                f.writelines(valid_lines)
+            os.replace(tmp_file, checkpoint_file)
+        return completed
 
-            print(
-                f"({item}/{len(self.output_encoders)})"\
-                f" Checking codec compatibility for encoder: {encoder_name}"
-            )
-            compatible_video_codecs = self.getCompatibleCodecs(
-                encoder_name, "video"
-            )
-            compatible_audio_codecs = self.getCompatibleCodecs(
-                encoder_name, "audio"
-            )
+    def writeCheckpoint(self, checkpoint, encoder_name, codecs):
+        """
+        Append one completed encoder to the checkpoint file
+        """
+        if checkpoint:
+            checkpoint.write(json.dumps({"encoder": encoder_name, "codecs": codecs}) + "\n")
+            checkpoint.flush()
 
-            compatible_video_codecs.sort()
-            compatible_audio_codecs.sort()
+    def buildEncoderMatrix(self, checkpoint_file=None) -> dict:
+        """
+        Probe every output encoder against every codec. In-process probes are
+        spread across a process pool one encoder at a time, then every pair
+        left for ffmpeg is probed in one pool so no encoder waits on the
+        slowest probe of the one before it.
 
-            data = {
-                encoder_name: {
-                    "codecs": {
-                        "video": compatible_video_codecs,
-                        "audio": compatible_audio_codecs
-                    }
-                }
-            }
+        Each finished encoder is appended to checkpoint_file, and encoders
+        already in it are skipped, so an interrupted build resumes.
+        """
+        compatibility_matrix = self.readCheckpoint(checkpoint_file)
+        if compatibility_matrix:
+            print(f"Resuming build, {len(compatibility_matrix)} encoders already checked")
+
+        encoder_list = [
+            encoder_name for encoder_name in self.output_encoders
+            if encoder_name not in compatibility_matrix
+        ]
+        subprocess_probes = []
+        item = len(compatibility_matrix)
+
+        with contextlib.ExitStack() as stack:
+            checkpoint = None
+            if checkpoint_file:
+                checkpoint = stack.enter_context(open(checkpoint_file, "a"))
+
+            if self.probe_in_process:
+                in_process_results = stack.enter_context(
+                    contextlib.closing(self.iterInProcessResults(encoder_list))
+                )
+            else:
+                in_process_results = zip(encoder_list, repeat((None, None)))
+
+            for encoder_name, results in in_process_results:
+                item += 1
+
+                print(
+                    f"({item}/{len(self.output_encoders)})"\
+                    f" Checking codec compatibility for encoder: {encoder_name}"
+                )
+                codecs = {}
+                pending = False
+                for type, type_results in zip(("video", "audio"), results):
+                    compatible_codecs, subprocess_codecs = self.splitCompatibleCodecs(
+                        type, type_results
+                    )
+                    codecs[type] = compatible_codecs
+                    if subprocess_codecs:
+                        subprocess_probes.append(
+                            (encoder_name, type, subprocess_codecs)
+                        )
+                        pending = True
+
+                compatibility_matrix[encoder_name] = {"codecs": codecs}
+                if not pending:
+                    self.writeCheckpoint(checkpoint, encoder_name, codecs)
+
+            if subprocess_probes:
+                print(
+                    f"Probing {sum(len(p[2]) for p in subprocess_probes)}"
+                    " codec/encoder pairs with ffmpeg"
+                )
+                probe_results = asyncio.run(
+                    self.testEncodesSubprocessAsync(subprocess_probes)
+                )
+                for (encoder_name, type, codec_list), results in zip(
+                    subprocess_probes, probe_results
+                ):
+                    codecs = compatibility_matrix[encoder_name]["codecs"]
+                    codecs[type] = self.mergeCompatibleCodecs(
+                        type, codecs[type], codec_list, results
+                    )
+
+                for encoder_name in dict.fromkeys(p[0] for p in subprocess_probes):
+                    self.writeCheckpoint(
+                        checkpoint, encoder_name,
+                        compatibility_matrix[encoder_name]["codecs"]
+                    )
+
+        # Keep the output in encoder order, whatever order it was resumed in
+        return {
+            encoder_name: compatibility_matrix[encoder_name]
+            for encoder_name in self.output_encoders
+            if encoder_name in compatibility_matrix
+        }
 
-            compatibility_matrix.update(data)
+    def iterInProcessResults(self, encoder_list):
+        """
+        Yield (encoder_name, results) for each encoder in order, probed in a
+        process pool one encoder per task. A probe which crashes inside
+        libavformat takes its worker down and breaks the pool, failing every
+        unfinished task. The encoder being waited on is then probed again on
+        its own, and left to ffmpeg if it crashes again. The other unfinished
+        encoders go to a new pool. The pool is only started if there are
+        encoders to probe.
+        """
+        executor = None
+        futures = {}
+        try:
+            for index, encoder_name in enumerate(encoder_list):
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=self.no_workers)
+                    for name in encoder_list[index:]:
+                        if name not in futures or futures[name].exception():
+                            futures[name] = self.submitInProcessProbe(executor, name)
 
-        return compatibility_matrix
+                try:
+                    results = futures.pop(encoder_name).result()
+                except BrokenProcessPool as e:
+                    # Wait for the broken pool to fail its remaining tasks,
+                    # so they are submitted again to the next one
+                    executor.shutdown(wait=True)
+                    executor = None
+                    results = self.probeInProcessAlone(encoder_name)
+                except Exception as e:
+                    print(f"\tIn-process probe failed for encoder: {encoder_name}: {e}")
+                    results = (None, None)
+                yield encoder_name, results
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def submitInProcessProbe(self, executor, encoder_name):
+        return executor.submit(
+            probeEncoderInProcess, encoder_name,
+            self.codec_list_video, self.codec_list_audio
+        )
 
-    def testEncode(self, encoder_format, codec_name, type) -> bool:
-        devnull = "NUL" if sys.platform.startswith("win") else "/dev/null"
+    def probeInProcessAlone(self, encoder_name):
+        """
+        Probe one encoder in a worker of its own, so that a crash can only
+        come from this encoder. Returns undecided results if it crashes.
+        """
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                return self.submitInProcessProbe(executor, encoder_name).result()
+            except Exception as e:
+                print(
+                    f"\tIn-process probe crashed for encoder: {encoder_name},"
+                    " probing it with ffmpeg"
+                )
+                return (None, None)
 
-        common_options = ["ffmpeg", "-hide_banner", "-y", "-f", "lavfi"]
-        media_specific_options = {
-            "video": [
-                "-i", "color=c=black:s=64x64:r=25",
-                "-frames:v", "1",
-                "-c:v", codec_name,
-                "-pix_fmt", "yuv420p"
-            ],
-            "audio": [
-                "-i", "sine=frequency=1000:duration=1:sample_rate=44100",
-                "-c:a", codec_name
-            ]
-        }
+    def buildProbeCommand(self, encoder_format, codec_list, type) -> list:
+        """
+        Build the ffmpeg command which encodes a short test signal into the
+        container format, with one output per codec in codec_list.
+        """
+        command = list(PROBE_INPUT_COMMANDS[type])
+        for codec_name in codec_list:
+            if type == "video":
+                command += [
+                    "-frames:v", "1",
+                    "-c:v", codec_name,
+                    "-threads", "1",
+                    "-pix_fmt", "yuv420p"
+                ]
+            else:
+                command += [
+                    "-frames:a", "1",
+                    "-c:a", codec_name,
+                    "-threads", "1"
+                ]
+            command += ["-f", encoder_format, DEVNULL]
 
-        command = common_options + media_specific_options[type] + ["-f", encoder_format, devnull]
+        return command
 
-        try:
-            result = self.ffmpegOutput(command)
-            if any(msg in result.stderr for msg in [
-                "codec not currently supported in container"
+    def probeSucceeded(self, returncode, stderr) -> bool:
+        """
+        Decide from an ffmpeg probe's return code and raw stderr bytes whether
+        the codec was accepted by the container.
+        """
+        if PROBE_ERROR_RE.search(stderr):
+            return False
+        return (returncode == 0)
+
+    def getFailedProbeOutput(self, stderr, output_count):
+        """
+        Find the index of the output which made a batched ffmpeg probe fail,
+        from the output number ffmpeg reports in its error lines. Returns None
+        if the failure cannot be attributed to a single output.
+        """
+        for line in stderr.splitlines():
+            if not any(msg in line for msg in [
+                b"Error", b"error", b"Could not", b"not supported"
             ]):
-                return False
-            return (result.returncode == 0)
+                continue
+            match = PROBE_OUTPUT_RE.search(line)
+            if match and int(match.group(1)) < output_count:
+                return int(match.group(1))
+        return None
 
-        except Exception as e:
-            print(e)
-            return False
+    async def runProbeAsync(self, semaphore, command):
+        """
+        Run an ffmpeg probe command, returning its return code and raw stderr.
+        The semaphore bounds how many ffmpeg processes run at once.
+        """
+        async with semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+        return process.returncode, stderr
+
+    async def testEncodeBatchAsync(
+        self, semaphore, encoder_format, codec_list, type
+    ) -> list:
+        """
+        Probe a batch of codecs with a single ffmpeg process. ffmpeg stops at
+        the first output it cannot set up, so the failing codec is marked as
+        incompatible and the rest of the batch is probed again. If a failure
+        cannot be attributed, the remaining codecs are probed one at a time.
+        """
+        results = {}
+        pending = list(codec_list)
 
-    def getCompatibleCodecs(self, encoder_name, type)  -> list:
+        while pending:
+            command = self.buildProbeCommand(encoder_format, pending, type)
+            try:
+                returncode, stderr = await self.runProbeAsync(semaphore, command)
+            except Exception as e:
+                print(f"\tError testing codecs {', '.join(pending)}: {e}")
+                results.update(dict.fromkeys(pending, False))
+                break
+
+            if self.probeSucceeded(returncode, stderr):
+                results.update(dict.fromkeys(pending, True))
+                break
+
+            if len(pending) == 1:
+                results[pending[0]] = False
+                break
+
+            failed_index = self.getFailedProbeOutput(stderr, len(pending))
+            if failed_index is None:
+                single_results = await asyncio.gather(*[
+                    self.testEncodeBatchAsync(
+                        semaphore, encoder_format, [codec_name], type
+                    )
+                    for codec_name in pending
+                ])
+                for codec_name, result in zip(pending, single_results):
+                    results[codec_name] = result[0]
+                break
+
+            results[pending.pop(failed_index)] = False
+
+        return [results[codec_name] for codec_name in codec_list]
+
+    async def testEncodesSubprocessAsync(self, probes):
+        """
+        Probe lists of codecs against container formats with ffmpeg
+        subprocesses on a single event loop. probes is a list of
+        (encoder_format, type, codec_list) tuples. Codecs are batched
+        self.probe_batch_size per ffmpeg process, and all batches share one
+        concurrency limit.
+        """
+        semaphore = asyncio.Semaphore(self.no_workers * 2)
+        batches = [
+            (probe_index, encoder_format, type, codec_list[i:i + self.probe_batch_size])
+            for probe_index, (encoder_format, type, codec_list) in enumerate(probes)
+            for i in range(0, len(codec_list), self.probe_batch_size)
+        ]
+        batch_results = await asyncio.gather(*[
+            self.testEncodeBatchAsync(semaphore, encoder_format, batch, type)
+            for _, encoder_format, type, batch in batches
+        ])
+
+        probe_results = [[] for _ in probes]
+        for (probe_index, *_), results in zip(batches, batch_results):
+            probe_results[probe_index] += results
+        return probe_results
+
+    def splitCompatibleCodecs(self, type, results=None):
+        """
+        Split the in-process probe results from probeEncoderInProcess for
+        every codec of the given type. Returns the compatible codecs, and the
+        codecs which still need an ffmpeg subprocess probe. Without results
+        (in-process probing is off) every codec needs a subprocess probe.
+        """
         compatible_codecs = []
+        subprocess_codecs = []
 
         if type == "video":
             codec_list = self.codec_list_video
         else:
             codec_list = self.codec_list_audio
 
-        with ThreadPoolExecutor(max_workers=self.no_workers) as executor:
-            future_to_codec = {
-                executor.submit(
-                    self.testEncode, encoder_name, codec_name, type
-                ): codec_name
-                for codec_name in codec_list
-            }
+        if results is None:
+            results = [None] * len(codec_list)
 
-            for future in as_completed(future_to_codec):
-                codec_name = future_to_codec[future]
-                try:
-                    result = future.result()
-                    if result:
-                        compatible_codecs.append(codec_name.lower())
-                except Exception as e:
-                    print(f"\tError testing codec {codec_name}: {e}")
+        # In-process probes are cheap, anything PyAV cannot decide is handed
+        # over to ffmpeg subprocesses
+        for codec_name, result in zip(codec_list, results):
+            if result is None:
+                subprocess_codecs.append(codec_name)
+            elif result:
+                compatible_codecs.append(codec_name)
 
-        print(f"\t{type} codecs: {len(compatible_codecs)}")
-        return compatible_codecs
+        return compatible_codecs, subprocess_codecs
+
+    def mergeCompatibleCodecs(
+        self, type, compatible_codecs, subprocess_codecs, results
+    ) -> list:
+        """
+        Merge subprocess probe results into the in-process results. Both are
+        filtered from the sorted codec list, so walking that list again keeps
+        the merged result sorted without a sort.
+        """
+        compatible = set(compatible_codecs)
+        compatible.update(
+            codec_name
+            for codec_name, result in zip(subprocess_codecs, results) if result
+        )
+
+        if type == "video":
+            codec_list = self.codec_list_video
+        else:
+            codec_list = self.codec_list_audio
+        return [codec_name for codec_name in codec_list if codec_name in compatible]
 
     def getCodec(self, codec_name):
-        try:
-            return av.codec.Codec(codec_name, mode='w')
-        except:
-            return None
+        return getWriteCodec(codec_name)
 
     def getCodecID(self, cdc):
         return cdc.id
@@ -313,25 +896,70 @@ class CompatibilityMatrix:
 
     def getCodecVideoFormats(self, cdc) -> list:
         if cdc and hasattr(cdc, 'video_formats') and cdc.video_formats:
-            video_formats = [format.name for format in cdc.video_formats]
-        else:
-            video_formats = []
-        video_formats.sort()
-        return video_formats
+            return sorted(format.name for format in cdc.video_formats)
+        return []
 
     def getCodecAudioFormats(self, cdc) -> list:
         if cdc and hasattr(cdc, 'audio_formats') and cdc.audio_formats:
-            audio_formats = [format.name for format in cdc.audio_formats]
-        else:
-            audio_formats = []
-        audio_formats.sort()
-        return audio_formats
+            return sorted(format.name for format in cdc.audio_formats)
+        return []
+
+    def getBuildCacheKey(self) -> str:
+        """
+        Key for the build cache. The matrix changes when ffmpeg or PyAV is
+        upgraded, with the probe method (in-process or subprocess), and with
+        the probe logic itself, so the key hashes all four.
+        """
+        result = subprocess.run(
+            ["ffmpeg", "-version"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        version = result.stdout + (
+            f"{av.__version__}:{self.probe_in_process}:{PROBE_VERSION}"
+        ).encode()
+        return hashlib.blake2b(version, digest_size=8).hexdigest()
+
+    def getBuildCacheFile(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.getBuildCacheKey()}.json")
 
     def buildCompatibilityMatrix(self):
-        compatibility_matrix = self.buildEncoderMatrix()
-        formatted_matrix = json.dumps(compatibility_matrix, indent=4)
-        with open(self.matrix_file, "w") as f:
-            f.write(formatted_matrix)
+        """
+        Build the compatibility matrix and write it to self.matrix_file. A
+        copy is cached per ffmpeg/PyAV build, so rebuilding against the same
+        build loads the cached copy instead of probing again, unless
+        self.use_build_cache is False.
+        """
+        cache_file = self.getBuildCacheFile()
+        if self.use_build_cache and os.path.exists(cache_file):
+            print(f"Using cached compatibility matrix: {cache_file}")
+            compatibility_matrix = self.readJsonFile(cache_file)
+        else:
+            # Progress is checkpointed per build, so an interrupted build
+            # resumes only against the same ffmpeg/PyAV build
+            checkpoint_file = f"{os.path.splitext(cache_file)[0]}.partial.jsonl"
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if not self.use_build_cache and os.path.exists(checkpoint_file):
+                os.remove(checkpoint_file)
+            compatibility_matrix = self.buildEncoderMatrix(checkpoint_file)
+            self.writeJsonFile(cache_file, compatibility_matrix)
+            os.remove(checkpoint_file)
+
+        self.writeJsonFile(self.matrix_file, compatibility_matrix, indent=4)
+
+    def writeJsonFile(self, file_path, data, indent=None):
+        """
+        Write JSON to a temporary file next to file_path, then move it into
+        place, so a crash mid-write never leaves a truncated file behind.
+        Files written without indent are only read back by this script, so
+        they are written without whitespace between separators.
+        """
+        tmp_file = f"{file_path}.tmp"
+        separators = None if indent is not None else (",", ":")
+        with open(tmp_file, "w") as f:
+            json.dump(data, f, indent=indent, separators=separators)
+        os.replace(tmp_file, file_path)
 
     def wrapText(self, items, width=20):
         """
@@ -339,13 +967,13 @@ class CompatibilityMatrix:
         """
         if isinstance(items, list):
             # Convert all items to strings, regardless of type
-            string_items = [str(item) if not isinstance(item, dict) else str(item) for item in items]
-            return "\n".join(textwrap.wrap(", ".join(string_items), width=width))
+            string_items = [str(item) for item in items]
+            return wrapJoinedText(", ".join(string_items), width)
         elif isinstance(items, str):
-            return "\n".join(textwrap.wrap(items, width=width))
+            return wrapJoinedText(items, width)
         elif isinstance(items, dict):
             # If it's a dictionary, convert it to a string
-            return "\n".join(textwrap.wrap(str(items), width=width))
+            return wrapJoinedText(str(items), width)
         return str(items)
 
     def formatJson(self, value, indent=4):
@@ -356,21 +984,42 @@ class CompatibilityMatrix:
             return json.dumps(value, indent=indent)
         return str(value)
 
-    def getEncoderAttributes(self, encoder_name):
+    def getEncoderAttributes(self, encoder_name, fields=None):
+        """
+        Return the attributes of an encoder. Muxers and options are the costly
+        lookups, so when fields is given they are only fetched if requested.
+        """
         encoder = self.getEncoder(encoder_name)
         if not encoder:
             return None
 
-        data = {
-            "long_name": self.getEncoderLongName(encoder),
-            "muxers": self.getEncoderMuxers(encoder),
-            "options": self.getEncoderOptions(encoder),
+        data = {"long_name": self.getEncoderLongName(encoder)}
+        if fields is None or "muxers" in fields or "options" in fields:
+            data.update(self.getEncoderMuxersAndOptions(encoder))
+        data.update({
             "file_extensions": self.getEncoderFileExtensions(encoder),
             "video_codecs": self.codec_matrix[encoder_name]['codecs']['video'],
             "audio_codecs": self.codec_matrix[encoder_name]['codecs']['audio']
-        }
+        })
         return data
 
+    def getEncoderMuxersAndOptions(self, encoder) -> dict:
+        return {
+            "muxers": self.getEncoderMuxers(encoder),
+            "options": self.getEncoderOptions(encoder)
+        }
+
+    def iterEncoderAttributes(self, encoder_list, fields=None):
+        """
+        Yield the attributes of each encoder in turn
+        """
+        for encoder_name in encoder_list:
+            enc_attributes = self.getEncoderAttributes(encoder_name, fields)
+            if enc_attributes:
+                yield enc_attributes
+            else:
+                print(f"Could not find attributes for: {encoder_name}")
+
     def getCodecAttributes(self, codec_name):
         codec = self.getCodec(codec_name)
         if not codec:
@@ -386,55 +1035,127 @@ class CompatibilityMatrix:
         }
         return data
 
-    def buildEncoderAttributesJson(self, encoder_list, print_json=False):
+    def buildEncoderAttributesJson(self, encoder_list, print_json=False, fields=None):
+        """
+        Build self.encoder_attributes_json for the encoders in encoder_list.
+        fields limits the attributes fetched, see getEncoderAttributes.
+        """
         if not self.codec_matrix:
             return
 
-        self.encoder_attributes_json = {}
+        # The attributes only depend on the encoder list and fields, so a
+        # repeat call with the same ones (e.g. several searches) reuses the
+        # last build
+        attributes_key = (tuple(encoder_list), fields and tuple(fields))
+        if attributes_key != self._attributes_key:
+            self.encoder_attributes_json = {}
+            self._attributes_key = attributes_key
+            self._search_indexes = None
+        else:
+            encoder_list = ()
 
         for encoder_name in encoder_list:
-            enc_attributes = self.getEncoderAttributes(encoder_name)
+            enc_attributes = self.getEncoderAttributes(encoder_name, fields)
             if enc_attributes:
-                data = {
-                    encoder_name: {
-                        "attributes": {
-                            "long_name": enc_attributes['long_name'],
-                            "muxers": enc_attributes['muxers'],
-                            "options": enc_attributes['options'],
-                            "file_extensions": enc_attributes['file_extensions'],
-                            "video_codecs": enc_attributes['video_codecs'],
-                            "audio_codecs": enc_attributes['audio_codecs']
-                        }
-                    }
+                self.encoder_attributes_json[encoder_name] = {
+                    "attributes": enc_attributes
                 }
-                self.encoder_attributes_json.update(data)
             else:
                 print(f"Could not find attributes for: {encoder_name}")
 
         if print_json:
-            formatted_matrix = json.dumps(self.encoder_attributes_json, indent=4)
-            print(formatted_matrix)
+            json.dump(self.encoder_attributes_json, sys.stdout, indent=4)
+            print()
 
-    def jsonToTable(self, json_data):
+    def formatCell(self, value, is_list, width=20) -> str:
         """
-        Converts JSON data into a tabulated table with wrapped text.
-        Automatically infers headers from the JSON keys.
+        Wrap a single table cell. List fields are joined, anything else is
+        wrapped as text.
         """
-        if not json_data:
-            print("No data provided!")
-            return
+        if is_list:
+            return wrapJoinedText(
+                ", ".join(str(item) for item in value or ()), width
+            )
+        return self.wrapText(value, width)
 
+    def jsonToTable(self, json_data, fields=None):
+        """
+        Converts JSON data into a tabulated table with wrapped text. Columns
+        follow the (field, is_list) spec in fields, otherwise the headers are
+        inferred from the JSON keys. json_data may be any iterable of dicts,
+        each row is formatted as it is produced.
+        """
         if isinstance(json_data, dict):
             json_data = [json_data]
 
-        headers = list(json_data[0].keys())
+        json_data = iter(json_data or ())
+        first_item = next(json_data, None)
+        if first_item is None:
+            print("No data provided!")
+            return
+        json_data = chain([first_item], json_data)
 
-        table_data = []
-        for item in json_data:
-            row = [self.formatJson(self.wrapText(value)) for value in item.values()]
-            table_data.append(row)
+        if fields is None:
+            headers = list(first_item.keys())
+            table_data = [
+                [self.formatJson(self.wrapText(value)) for value in item.values()]
+                for item in json_data
+            ]
+        else:
+            headers = [field for field, _ in fields]
+            table_data = [
+                [self.formatCell(item[field], is_list) for field, is_list in fields]
+                for item in json_data
+            ]
+
+        if self.use_tabulate:
+            print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        else:
+            print(self.renderGrid(headers, table_data))
 
-        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+    def renderGrid(self, headers, rows) -> str:
+        """
+        Render rows as a grid table laid out like tabulate's "grid" format.
+        Column widths are worked out in a single pass over the cells, with
+        the same minimum padding past the header, and multi-line cells are
+        padded out to the tallest cell in the row.
+        Columns holding only numbers are right-aligned, as tabulate does,
+        but values are printed as given rather than reformatted.
+        """
+        split_rows = [[str(cell).split("\n") for cell in row] for row in rows]
+        # tabulate makes every column at least two wider than its header
+        col_widths = [len(str(header)) + 2 for header in headers]
+        col_numeric = [None] * len(headers)
+        for row in split_rows:
+            for i, lines in enumerate(row):
+                col_widths[i] = max(col_widths[i], max(map(len, lines)))
+                if lines == [""] or col_numeric[i] is False:
+                    continue
+                col_numeric[i] = len(lines) == 1 and isNumber(lines[0])
+
+        justify = [
+            str.rjust if numeric else str.ljust for numeric in col_numeric
+        ]
+
+        def border(char):
+            return "+" + "+".join(char * (w + 2) for w in col_widths) + "+"
+
+        def renderRow(cells):
+            height = max(len(lines) for lines in cells)
+            return "\n".join(
+                "| " + " | ".join(
+                    justify[i](lines[n] if n < len(lines) else "", col_widths[i])
+                    for i, lines in enumerate(cells)
+                ) + " |"
+                for n in range(height)
+            )
+
+        separator = border("-")
+        output = [separator, renderRow([[str(h)] for h in headers]), border("=")]
+        for row in split_rows:
+            output.append(renderRow(row))
+            output.append(separator)
+        return "\n".join(output)
 
     def displayEncoderAttributes(self, encoder_list):
         """
@@ -443,16 +1164,10 @@ class CompatibilityMatrix:
         if not self.codec_matrix:
             return
 
-        table_data = []
-
-        for encoder_name in encoder_list:
-            enc_attributes = self.getEncoderAttributes(encoder_name)
-            if enc_attributes:
-                table_data.append(enc_attributes)
-            else:
-                print(f"Could not find attributes for: {encoder_name}")
-
-        self.jsonToTable(table_data)
+        self.jsonToTable(
+            self.iterEncoderAttributes(encoder_list),
+            ENCODER_FIELDS
+        )
 
     def displayCodecAttributes(self, codec_list):
         """
@@ -469,9 +1184,27 @@ class CompatibilityMatrix:
             else:
                 print(f"Could not find attributes for: {codec_name}")
 
-        self.jsonToTable(table_data)
+        self.jsonToTable(table_data, CODEC_FIELDS)
         return valid_codecs
 
+    def getSearchIndexes(self) -> dict:
+        """
+        Reverse indexes of encoder_attributes_json, mapping each video codec,
+        audio codec and file extension to the set of encoders supporting it.
+        Built once per set of encoder attributes.
+        """
+        if self._search_indexes is None:
+            self._search_indexes = {
+                "video_codecs": {},
+                "audio_codecs": {},
+                "file_extensions": {}
+            }
+            for row_name, attributes in self.encoder_attributes_json.items():
+                for field, index in self._search_indexes.items():
+                    for value in attributes['attributes'][field]:
+                        index.setdefault(value, set()).add(row_name)
+        return self._search_indexes
+
     def searchExtensionsAttributesJson(
         self,
         video_codec=None, audio_codec=None, extension=None
@@ -487,32 +1220,22 @@ class CompatibilityMatrix:
             f"\tAudio Codec: {audio_codec}"
         )
 
+        # Searching never looks at muxers or options, so skip fetching them
         self.buildEncoderAttributesJson(
-            self.output_encoders
+            self.output_encoders,
+            fields=("video_codecs", "audio_codecs", "file_extensions")
         )
 
-        video_encoders = []
-        audio_encoders = []
-        extension_encoders = []
-
-        if video_codec:
-            for row_name, attributes in self.encoder_attributes_json.items():
-                if video_codec.lower() in attributes['attributes']['video_codecs']:
-                    video_encoders.append(row_name)
-
-        if audio_codec:
-            for row_name, attributes in self.encoder_attributes_json.items():
-                if audio_codec.lower() in attributes['attributes']['audio_codecs']:
-                    audio_encoders.append(row_name)
-
-        if extension:
-            for row_name, attributes in self.encoder_attributes_json.items():
-                if extension.lower() in attributes['attributes']['file_extensions']:
-                    extension_encoders.append(row_name)
-
-        sets_to_compare = [set(lst) for lst in [
-            video_encoders, audio_encoders, extension_encoders
-        ] if lst]
+        search_indexes = self.getSearchIndexes()
+        sets_to_compare = [
+            search_indexes[field].get(value.lower())
+            for field, value in (
+                ("video_codecs", video_codec),
+                ("audio_codecs", audio_codec),
+                ("file_extensions", extension)
+            ) if value
+        ]
+        sets_to_compare = [encoders for encoders in sets_to_compare if encoders]
 
         if not sets_to_compare:
             return []
@@ -547,6 +1270,18 @@ class CompatibilityMatrix:
             '--build-matrix', action='store_true',
             help='Build compatibility matrix'
         )
+        parser.add_argument(
+            '--subprocess-probe', action='store_true',
+            help='Probe codecs by running ffmpeg instead of in-process with PyAV'
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='With --build-matrix, probe again instead of using the cache'
+        )
+        parser.add_argument(
+            '--tabulate', action='store_true',
+            help='Render tables with tabulate instead of the built-in renderer'
+        )
 
         search_group = parser.add_argument_group(
             'Search Options',
@@ -577,6 +1312,9 @@ class CompatibilityMatrix:
         return args
 
 if __name__ == "__main__":
+    # Frozen builds re-run this entry point in each spawned pool worker
+    multiprocessing.freeze_support()
+
     compatibility_matrix = CompatibilityMatrix()
     args = compatibility_matrix.configureCliArguments()
 
@@ -584,6 +1322,15 @@ if __name__ == "__main__":
         print("ffmpeg is not installed correctly")
         sys.exit(1)
 
+    if args.subprocess_probe:
+        compatibility_matrix.probe_in_process = False
+
+    if args.tabulate:
+        compatibility_matrix.use_tabulate = True
+
+    if args.rebuild:
+        compatibility_matrix.use_build_cache = False
+
     if args.build_matrix:
         compatibility_matrix.buildCompatibilityMatrix()
 
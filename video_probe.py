@@ -7,14 +7,33 @@ import subprocess
 import textwrap
 
 from tabulate import tabulate
-from deepdiff import DeepDiff
+from concurrent.futures import Future, ThreadPoolExecutor
 from compatibility_matrix import CompatibilityMatrix
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class VideoProbe:
     def __init__(self):
         self.compatibility_matrix = CompatibilityMatrix()
         self.compare_diff = False
         self.compare_matches = False
+        self._probe_cache = {}
+
+        # Cap ffprobe's stream analysis at 1MB / 2 seconds of the file,
+        # below libavformat's defaults of 5MB and 5 seconds (longer for mpeg,
+        # mpegts and flv), for probes which are only compared. Transcode
+        # settings and the interlacing check always use the defaults, as
+        # has_b_frames, field_order and r_frame_rate can change with a
+        # shorter analysis. Disable (--deep-probe) to compare with the
+        # defaults, for files whose streams only appear later in the file.
+        self.fast_probe = True
+        self.fast_probe_options = [
+            "-probesize", "1000000",
+            "-analyzeduration", "2000000"
+        ]
 
         # Mapping betwen video settings and ffmpeg video flags
         self.video_map = {
@@ -43,6 +62,17 @@ class VideoProbe:
             "audio_bit_rate":        ("-b:a", None),
         }
 
+        # Flattened (json key, flag, cast) entries of the maps above, so
+        # building a command does not re-walk and unpack the maps each time
+        self._video_items = tuple(
+            (key, flag, cast_func)
+            for key, (flag, cast_func) in self.video_map.items()
+        )
+        self._audio_items = tuple(
+            (key, flag, cast_func)
+            for key, (flag, cast_func) in self.audio_map.items()
+        )
+
         # Mapping between video settings and ffprobe json keys for video
         self.video_transcode_settings = {
             "codec_name":       "video_codec",
@@ -89,26 +119,73 @@ class VideoProbe:
             "Apple ProRes 4444 XQ":   "5"
         }
 
-    def ffprobeJsonFromFile(self, file_path) -> dict:
+        # The ffprobe entries needed to build transcode settings, so ffprobe
+        # does not report (and we do not parse) every format and stream field
+        self.transcode_show_entries = (
+            "format=bit_rate:format_tags:stream={}:stream_tags=encoder"
+        ).format(
+            ",".join(dict.fromkeys([
+                "codec_type",
+                *self.video_transcode_settings,
+                *self.audio_transcode_settings
+            ]))
+        )
+
+    def ffprobeJsonFromFile(
+        self, file_path, show_entries=None, fast_probe=False
+    ) -> dict:
         """
         Extract verbose JSON data using ffmpeg from a specified file path.
         This seperates the json into streams, with 0 normally reserved for video.
+        If show_entries is given, ffprobe only reports those format and stream
+        entries instead of every field. fast_probe caps the stream analysis,
+        unless self.fast_probe is off. Results are cached per file, and a
+        changed file (new size or modification time) is probed again.
         """
+        fast_probe = fast_probe and self.fast_probe
+        try:
+            stat = os.stat(file_path)
+            file_key = (
+                os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size,
+                fast_probe
+            )
+            cache_key = file_key + (show_entries,)
+        except OSError as e:
+            file_key = cache_key = None
+
+        # A full probe of the file also answers any narrower request
+        for key in (cache_key, file_key and file_key + (None,)):
+            if key in self._probe_cache:
+                return self._probe_cache[key]
+
+        if show_entries:
+            show_options = ["-show_entries", show_entries]
+        else:
+            show_options = ["-show_format", "-show_streams"]
+
         try:
             command = [
                 "ffprobe",
                 "-v", "error",
-                "-show_format",
-                "-show_streams",
+                *(self.fast_probe_options if fast_probe else []),
+                *show_options,
                 "-of", "json",
                 file_path
             ]
             result = subprocess.run(
-                command, capture_output=True, text=True, check=True
+                command, capture_output=True, check=True
             )
         except Exception as e:
             return {}
-        return json.loads(result.stdout)
+        # The raw bytes are parsed directly, skipping a text decode
+        if orjson:
+            ffprobe_json = orjson.loads(result.stdout)
+        else:
+            ffprobe_json = json.loads(result.stdout)
+
+        if cache_key:
+            self._probe_cache[cache_key] = ffprobe_json
+        return ffprobe_json
 
     def ffmpegRun(self, command):
         """
@@ -166,7 +243,9 @@ class VideoProbe:
         then generates a dictionary of transcode settings and conver these into
         a valid ffmpeg command
         """
-        ffprobe_json = self.ffprobeJsonFromFile(file_path)
+        ffprobe_json = self.ffprobeJsonFromFile(
+            file_path, self.transcode_show_entries
+        )
         if not ffprobe_json:
             print(f"\nUnable to get metadata for {file_path}\n")
             return
@@ -225,9 +304,15 @@ class VideoProbe:
             self.reformatJsonForTable(transcode_data)
         )
 
+        # When converting the probed file itself, its ffprobe data is reused
+        # for the interlacing check instead of probing it again
+        input_ffprobe_json = None
+        if input_file and os.path.abspath(input_file) == os.path.abspath(file_path):
+            input_ffprobe_json = ffprobe_json
+
         # Generate the FFmpeg command and (optionally) run it
         ffmpeg_command = self.ffmpegGenerateTranscodeCommand(
-            transcode_data, input_file, output_file
+            transcode_data, input_file, output_file, input_ffprobe_json
         )
         cmd_string = " ".join(shlex.quote(arg) for arg in ffmpeg_command)
 
@@ -316,14 +401,18 @@ class VideoProbe:
             value = stream.get(probe_key, None)
             transcode_data[transcode_key] = value
 
-    def checkInputFileInterlacing(self, input_file) -> bool:
+    def checkInputFileInterlacing(self, input_file, ffprobe_json=None) -> bool:
         """
-        Check an input file to see if it's progressive or interlaced.
+        Check an input file to see if it's progressive or interlaced. Pass
+        ffprobe_json if the input file has already been probed.
         """
         input_file_interlaced = False
-        input_file_ffprobe_json = None
+        input_file_ffprobe_json = ffprobe_json
         if input_file:
-            input_file_ffprobe_json = self.ffprobeJsonFromFile(input_file)
+            if input_file_ffprobe_json is None:
+                input_file_ffprobe_json = self.ffprobeJsonFromFile(
+                    input_file, self.transcode_show_entries
+                )
             if input_file_ffprobe_json:
                 for stream in input_file_ffprobe_json.get("streams", []):
                     if stream.get("codec_type") == "video":
@@ -332,10 +421,12 @@ class VideoProbe:
         return input_file_interlaced
 
     def ffmpegGenerateTranscodeCommand(
-        self, json_data, input_file=None, output_file=None
+        self, json_data, input_file=None, output_file=None,
+        input_ffprobe_json=None
     ) -> list:
         """
-        Converts a JSON dictionary into an FFmpeg command line.
+        Converts a JSON dictionary into an FFmpeg command line. If the input
+        file has already been probed, pass its data as input_ffprobe_json.
         """
         # Create the base command
         command = ["ffmpeg", "-y"]
@@ -348,7 +439,9 @@ class VideoProbe:
 
         command += ["-i", input_file]
 
-        input_file_interlaced = self.checkInputFileInterlacing(input_file)
+        input_file_interlaced = self.checkInputFileInterlacing(
+            input_file, input_ffprobe_json
+        )
         video_filter_parts = []
 
         # Handle scale if video_width/height exist
@@ -358,12 +451,13 @@ class VideoProbe:
             video_filter_parts.append(f"scale={width}:{height}")
 
         # # Iterate through the video mapping
-        for json_key, (flag, cast_func) in self.video_map.items():
+        for json_key, flag, cast_func in self._video_items:
             value = json_data.get(json_key)
             if value is not None:
                 value_str = cast_func(value) if cast_func else str(value)
                 if value_str.strip():
-                    command += [flag, value_str]
+                    command.append(flag)
+                    command.append(value_str)
 
         # If input_file_interlaced == False, but the desired field_order is
         # progressive apply the yadif filter to deinterlace
@@ -385,12 +479,13 @@ class VideoProbe:
             command += ["-vf", ",".join(video_filter_parts)]
 
         # Iterate through audio mapping
-        for json_key, (flag, cast_func) in self.audio_map.items():
+        for json_key, flag, cast_func in self._audio_items:
             value = json_data.get(json_key)
             if value is not None:
                 value_str = cast_func(value) if cast_func else str(value)
                 if value_str.strip():
-                    command += [flag, value_str]
+                    command.append(flag)
+                    command.append(value_str)
 
         # Add the metadata tags here
         tags = json_data.get("tags", {})
@@ -412,16 +507,22 @@ class VideoProbe:
     def flattenDict(self, json_data, parent_key=""):
         """
         Flattens nested dictionaries into a single-level dictionary with
-        dot-separated keys.
-        """
-        items = []
-        for key, value in json_data.items():
-            new_key = f"{parent_key}.{key}" if parent_key else key
-            if isinstance(value, dict):
-                items.extend(self.flattenDict(value, new_key).items())
+        dot-separated keys. Nested dicts are walked with a stack of item
+        iterators rather than recursion, keeping the original key order.
+        """
+        flattened = {}
+        stack = [(parent_key, iter(json_data.items()))]
+        while stack:
+            prefix, items = stack[-1]
+            for key, value in items:
+                new_key = f"{prefix}.{key}" if prefix else key
+                if isinstance(value, dict):
+                    stack.append((new_key, iter(value.items())))
+                    break
+                flattened[new_key] = value
             else:
-                items.append((new_key, value))
-        return dict(items)
+                stack.pop()
+        return flattened
 
     def convertFlattenedDataToTable(self, flattened_data):
         """
@@ -439,7 +540,14 @@ class VideoProbe:
         1. Differences between the objects
         2. Matches (keys/values that are identical)
         """
-        differences, matches = self.getJsonComparisons(json1, json2)
+        if not self.compare_diff and not self.compare_matches:
+            return
+
+        differences, matches = self.getJsonComparisons(
+            json1, json2,
+            collect_differences=self.compare_diff,
+            collect_matches=self.compare_matches
+        )
 
         if self.compare_diff:
             print("\nDifferences:")
@@ -455,14 +563,17 @@ class VideoProbe:
             else:
                 print("No matches found!")
 
-    def getJsonComparisons(self, json1, json2):
+    def getJsonComparisons(
+        self, json1, json2, collect_differences=True, collect_matches=True
+    ):
         """
         Recursively compares two JSON objects and returns two lists:
         1. differences (keys/values that differ)
         2. matches (keys/values that match)
+        A list which is not collected is returned as None.
         """
-        differences = []
-        matches = []
+        differences = [] if collect_differences else None
+        matches = [] if collect_matches else None
         self.compareItems(json1, json2, differences, matches, parentKey="")
         return differences, matches
 
@@ -470,15 +581,18 @@ class VideoProbe:
         """
         Main comparison method that checks whether values are dict, list,
         or scalars. Delegates to compareDicts / compareLists if needed,
-        otherwise compares directly.
+        otherwise compares directly. Pass None for differences or matches to
+        skip collecting them.
         """
         if isinstance(value1, dict) and isinstance(value2, dict):
             self.compareDicts(value1, value2, differences, matches, parentKey)
         elif isinstance(value1, list) and isinstance(value2, list):
             self.compareLists(value1, value2, differences, matches, parentKey)
         else:
-            # Direct scalar comparison
+            # Direct scalar comparison, only building rows which are kept
             if value1 != value2:
+                if differences is None:
+                    return
                 differences.append({
                     "Section": parentKey.rsplit('.', 1)[0] if '.' in parentKey else "",
                     "Setting": parentKey,
@@ -486,6 +600,8 @@ class VideoProbe:
                     "Value in JSON2": value2
                 })
             else:
+                if matches is None:
+                    return
                 matches.append({
                     "Section": parentKey.rsplit('.', 1)[0] if '.' in parentKey else "",
                     "Setting": parentKey,
@@ -498,7 +614,7 @@ class VideoProbe:
         Compares two dictionaries, iterating through their keys.
         Delegates the actual item comparison to compareItems.
         """
-        allKeys = set(dict1.keys()) | set(dict2.keys())
+        allKeys = dict1.keys() | dict2.keys()
         for key in allKeys:
             fullKey = f"{parentKey}.{key}" if parentKey else key
             val1 = dict1.get(key)
@@ -529,10 +645,21 @@ class VideoProbe:
         comparison to show the similarities or differences between the two
         sets of metadata.
         """
-        if isinstance(source, str):
-            source = self.ffprobeJsonFromFile(source)
-        if isinstance(dest, str):
-            dest = self.ffprobeJsonFromFile(dest)
+        # The two probes are independent ffprobe processes, so run them at
+        # the same time rather than one after the other
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            if isinstance(source, str):
+                source = executor.submit(
+                    self.ffprobeJsonFromFile, source, fast_probe=True
+                )
+            if isinstance(dest, str):
+                dest = executor.submit(
+                    self.ffprobeJsonFromFile, dest, fast_probe=True
+                )
+        if isinstance(source, Future):
+            source = source.result()
+        if isinstance(dest, Future):
+            dest = dest.result()
 
         if not isinstance(source, dict) or not isinstance(dest, dict):
             print("Could not get file metadata")
@@ -565,6 +692,12 @@ class VideoProbe:
             '--run', action='store_true',
             help='Start transcoding using ffmpeg'
         )
+        parser.add_argument(
+            '--deep-probe', action='store_true',
+            help="With --compare, use ffprobe's default probe size and "
+                 "analyze duration instead of capping them at 1MB / 2 "
+                 "seconds. Transcode settings always use the defaults"
+        )
         compare_group = parser.add_argument_group(
             'Compare video files',
             'Compare detailed metadata from two files'
@@ -619,6 +752,9 @@ class VideoProbe:
         if args.run:
             run_command = True
 
+        if args.deep_probe:
+            self.fast_probe = False
+
         if args.probe_file:
             if os.path.exists(args.probe_file):
                 self.getTranscodeSettingsFromFile(